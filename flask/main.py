@@ -1,5 +1,8 @@
 import io
-import re
+import os
+import sys
+import json
+import time
 import mlflow
 import pickle
 import matplotlib
@@ -11,13 +14,130 @@ from flask_cors import CORS
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import matplotlib.dates as mdates
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from mlflow.tracking import MIflowClient
-from flask import Flask, request, jsonify, send_file
+from functools import lru_cache
+from mlflow.tracking import MlflowClient
+from flask import Flask, request, jsonify, send_file, g
+
+from serving_metrics import (
+    MetricsRegistry, Counter, Gauge, Histogram, CacheStats,
+    LATENCY_BUCKETS, BATCH_SIZE_BUCKETS
+)
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+from src.data import data_preprocessing
 
 
 # Initilize the Flask
 app = Flask(__name__)
 CORS(app)
 
+MODEL_PATH = os.environ.get('MODEL_PATH', os.path.join(ROOT_DIR, 'lgbm_model.pkl'))
+VECTORIZER_PATH = os.environ.get('VECTORIZER_PATH', os.path.join(ROOT_DIR, 'tfidf_vectorizer.pkl'))
+PREDICTION_PHASES = ('preprocess', 'vectorize', 'predict', 'serialize')
+
+# ─── PREPROCESSING ──────────────────────────────────────────────────────────────
+# The training pipeline's cleaning, so served and training text never drift apart;
+# repeated comments are served from the cache.
+preprocess_comment = lru_cache(maxsize=10000)(data_preprocessing.preprocess_comment)
+
+# ─── MODEL LOADING ──────────────────────────────────────────────────────────────
+def load_model_and_vectorizer(model_path: str, vectorizer_path: str):
+    """Load the trained model and TF-IDF vectorizer from pickle files.
+
+    A `.npz` model path loads the quantized export (see src/model/quantize_model.py).
+    """
+    if model_path.endswith('.npz'):
+        # Numpy-only module; does not pull in the training pipeline
+        from src.model.quantized_lgbm import QuantizedLGBM
+        model = QuantizedLGBM.load(model_path)
+    else:
+        with open(model_path, 'rb') as file:
+            model = pickle.load(file)
+    with open(vectorizer_path, 'rb') as file:
+        vectorizer = pickle.load(file)
+    return model, vectorizer
+
+def get_model_version() -> str:
+    """Model version from MODEL_VERSION, else the MLflow run id in experiment_info.json."""
+    if os.environ.get('MODEL_VERSION'):
+        return os.environ['MODEL_VERSION']
+    try:
+        with open(os.path.join(ROOT_DIR, 'experiment_info.json'), 'r') as file:
+            return json.load(file)['run_id']
+    except Exception:
+        return 'unknown'
+
+model, vectorizer = load_model_and_vectorizer(MODEL_PATH, VECTORIZER_PATH)
+
+# ─── METRICS ────────────────────────────────────────────────────────────────────
+metrics = MetricsRegistry()
+REQUESTS_TOTAL = metrics.register(Counter(
+    'sentiment_requests_total', 'Prediction requests served.'))
+REQUEST_ERRORS = metrics.register(Counter(
+    'sentiment_request_errors_total', 'Prediction requests that failed.'))
+IN_FLIGHT = metrics.register(Gauge(
+    'sentiment_requests_in_flight', 'Requests currently being processed.'))
+PHASE_LATENCY = metrics.register(Histogram(
+    'sentiment_phase_latency_seconds', 'Prediction latency by phase.',
+    LATENCY_BUCKETS, label_name='phase', label_values=PREDICTION_PHASES))
+REQUEST_LATENCY = metrics.register(Histogram(
+    'sentiment_request_latency_seconds', 'End-to-end request latency.', LATENCY_BUCKETS))
+BATCH_SIZE = metrics.register(Histogram(
+    'sentiment_batch_size', 'Comments per prediction request.', BATCH_SIZE_BUCKETS))
+metrics.register(CacheStats('sentiment_preprocess_cache', preprocess_comment))
+metrics.register(Gauge(
+    'sentiment_model_info', 'Loaded model version.', labels={'version': get_model_version()})).set(1)
+
+@app.before_request
+def track_request_start():
+    if request.endpoint != 'metrics_endpoint':
+        IN_FLIGHT.inc()
+        g.request_start = time.perf_counter()
+
+@app.teardown_request
+def track_request_end(exc):
+    start = g.pop('request_start', None)
+    if start is not None:
+        IN_FLIGHT.dec()
+        REQUEST_LATENCY.observe(time.perf_counter() - start)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return app.response_class(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
+
+# ─── ROUTES ─────────────────────────────────────────────────────────────────────
+@app.route('/predict', methods=['POST'])
+def predict():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    comments = data.get('comments')
+    if not comments:
+        return jsonify({"error": "No comments provided"}), 400
+    if not isinstance(comments, list) or not all(isinstance(comment, str) for comment in comments):
+        return jsonify({"error": "'comments' must be a list of strings"}), 400
+
+    REQUESTS_TOTAL.inc()
+    BATCH_SIZE.observe(len(comments))
+    try:
+        with PHASE_LATENCY.time('preprocess'):
+            preprocessed = [preprocess_comment(comment) for comment in comments]
+        with PHASE_LATENCY.time('vectorize'):
+            transformed = vectorizer.transform(preprocessed)
+        with PHASE_LATENCY.time('predict'):
+            predictions = model.predict(transformed).tolist()
+        with PHASE_LATENCY.time('serialize'):
+            payload = json.dumps([
+                {"comment": comment, "sentiment": str(sentiment)}
+                for comment, sentiment in zip(comments, predictions)
+            ])
+    except Exception as e:
+        REQUEST_ERRORS.inc()
+        return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
+
+    return app.response_class(payload, mimetype='application/json')
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,172 @@
+"""Low-overhead serving metrics rendered in the Prometheus text format.
+
+Every metric pre-allocates its storage when it is created, so recording a
+value is a bisect over a short tuple plus an in-place list increment under a
+lock. Nothing is allocated on the request hot path; all formatting work is
+done lazily when `/metrics` is scraped.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds (upper bounds, +Inf is implicit)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Number of comments per prediction request
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    inner = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    return '{' + inner + '}'
+
+
+class Counter:
+    """Monotonically increasing counter."""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def render(self) -> list:
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} counter',
+            f'{self.name} {self._value}',
+        ]
+
+
+class Gauge:
+    """Value that can go up and down (e.g. in-flight requests)."""
+
+    def __init__(self, name: str, documentation: str, labels: dict = None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels or {}
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def render(self) -> list:
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} gauge',
+            f'{self.name}{_format_labels(self.labels)} {self._value}',
+        ]
+
+
+class Histogram:
+    """Fixed-bucket histogram, optionally split by a single label.
+
+    Label values must be declared up front so their bucket arrays can be
+    allocated once; `observe` never allocates.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: tuple,
+                 label_name: str = None, label_values: tuple = ('',)):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label_name = label_name
+        # One slot per bucket plus one for +Inf, per label value
+        self._counts = {value: [0] * (len(self.buckets) + 1) for value in label_values}
+        self._sums = {value: 0.0 for value in label_values}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str = '') -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[label_value][index] += 1
+            self._sums[label_value] += value
+
+    @contextmanager
+    def time(self, label_value: str = ''):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, label_value)
+
+    def render(self) -> list:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            snapshot = {value: (list(counts), self._sums[value]) for value, counts in self._counts.items()}
+
+        for label_value, (counts, total) in snapshot.items():
+            base = {self.label_name: label_value} if self.label_name else {}
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels({**base, "le": bound})} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{_format_labels({**base, "le": "+Inf"})} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(base)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(base)} {cumulative}')
+        return lines
+
+
+class CacheStats:
+    """Exposes `functools.lru_cache` statistics as hit/miss counters and a hit ratio."""
+
+    def __init__(self, name: str, cached_function):
+        self.name = name
+        self.cached_function = cached_function
+
+    def render(self) -> list:
+        info = self.cached_function.cache_info()
+        lookups = info.hits + info.misses
+        ratio = info.hits / lookups if lookups else 0.0
+        return [
+            f'# HELP {self.name}_hits_total Cache hits.',
+            f'# TYPE {self.name}_hits_total counter',
+            f'{self.name}_hits_total {info.hits}',
+            f'# HELP {self.name}_misses_total Cache misses.',
+            f'# TYPE {self.name}_misses_total counter',
+            f'{self.name}_misses_total {info.misses}',
+            f'# HELP {self.name}_hit_ratio Cache hit ratio since start-up.',
+            f'# TYPE {self.name}_hit_ratio gauge',
+            f'{self.name}_hit_ratio {ratio}',
+            f'# HELP {self.name}_size Entries currently cached.',
+            f'# TYPE {self.name}_size gauge',
+            f'{self.name}_size {info.currsize}',
+        ]
+
+
+class MetricsRegistry:
+    """Holds all metrics and renders them for the `/metrics` endpoint."""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
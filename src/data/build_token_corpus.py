@@ -0,0 +1,93 @@
+import os
+import sys
+import yaml
+import logging
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.utils.instrumentation import instrument_stage
+from src.data.token_corpus import build_token_corpora, save_token_corpus
+
+# ─── LOGGING SETUP ──────────────────────────────────────────────────────────────
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler('build_token_corpus.log')
+file_handler.setLevel(logging.ERROR)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# Splits encoded against one shared vocabulary (see build_token_corpora)
+SPLITS = ('train', 'test', 'validation')
+
+# ─── HELPERS ────────────────────────────────────────────────────────────────────
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug("Parameters retrieved from %s", params_path)
+        return params
+    except Exception as e:
+        logger.error("Unexpected error %s: %s", params_path, e)
+        raise
+
+def get_root_directory() -> str:
+    """Get the root directory of the project."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(current_dir, '..', '..'))
+
+# ─── TOKEN CORPUS ───────────────────────────────────────────────────────────────
+@instrument_stage('build_token_corpus', rows=lambda result, splits, *a, **kw: sum(len(df) for df in splits.values()))
+def save_token_corpora(splits: dict, interim_path: str, text_column: str, target_column: str) -> None:
+    """Write array-backed token-ID corpora (<split>_corpus.npz) next to the processed CSVs."""
+    try:
+        os.makedirs(interim_path, exist_ok=True)
+
+        corpora = build_token_corpora(
+            [df[text_column].fillna('').values for df in splits.values()],
+            [df[target_column].values for df in splits.values()]
+        )
+        for split, corpus in zip(splits, corpora):
+            save_token_corpus(corpus, os.path.join(interim_path, f'{split}_corpus.npz'))
+
+    except Exception as e:
+        logger.error("Error saving token corpora: %s", e)
+        raise
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────────
+def main():
+    try:
+        root_dir = get_root_directory()
+        params = load_params(os.path.join(root_dir, 'params.yaml'))['preprocessing']
+        text_column = params.get('text_column', 'clean_comment')
+        target_column = params.get('target_column', 'category')
+        interim_path = os.path.join(root_dir, 'data/interim')
+
+        if params.get('token_corpus', False):
+            splits = {split: pd.read_csv(os.path.join(interim_path, f'{split}_processed.csv')) for split in SPLITS}
+        else:
+            # DVC outputs must always exist: write empty placeholders, so the
+            # default CSV path pays nothing for the corpus
+            logger.debug("preprocessing.token_corpus is off; writing empty token corpora")
+            empty = pd.DataFrame({text_column: pd.Series(dtype=object), target_column: pd.Series(dtype='int64')})
+            splits = {split: empty for split in SPLITS}
+
+        save_token_corpora(splits, interim_path, text_column, target_column)
+        logger.info("Token corpora written to %s", interim_path)
+
+    except Exception as e:
+        logger.error("Error in token corpus pipeline: %s", e)
+        print(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
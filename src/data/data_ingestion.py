@@ -1,9 +1,12 @@
 import os
+import sys
 import yaml
 import logging
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.utils.instrumentation import instrument_stage
 
 # Logging configuration
 logger = logging.getLogger("data_ingestion")
@@ -46,6 +49,7 @@ def read_yaml(params_path: str) -> dict:
         logger.error(f'Unexpected error: {e}')
         raise
     
+@instrument_stage('ingest_data')
 def ingest_data(data_url: str) -> pd.DataFrame:
     """Load data from CSV file or URL.
     
@@ -93,13 +97,140 @@ def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
         logger.error(f"Unexpected error during preprocessing: {e}")
         raise
     
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
-    """Save train and test data to CSV files.
+def assign_splits(df: pd.DataFrame, key_column: str, test_size: float,
+                  validation_size: float, random_state: int) -> pd.Series:
+    """Assign every row to 'train', 'validation' or 'test' by hashing its key.
+    
+    The split of a row depends only on its own key and the seed, so the result
+    is identical whether the frame is processed at once or chunk by chunk (in
+    any order or in parallel), and rows already seen keep their split when new
+    rows are added.
+    
+    Args:
+        df (pd.DataFrame): Input dataframe
+        key_column (str): Column whose value identifies a row (e.g. the comment text)
+        test_size (float): Fraction of rows for the test set
+        validation_size (float): Fraction of rows for the validation set
+        random_state (int): Seed mixed into the hash
+        
+    Returns:
+        pd.Series: Split name per row, aligned with df.index
+    """
+    try:
+        if test_size + validation_size >= 1:
+            raise ValueError(f"test_size + validation_size must be < 1, got {test_size + validation_size}")
+        
+        hash_key = f"{random_state:016d}"[-16:]
+        hashes = pd.util.hash_pandas_object(df[key_column].astype(str), index=False, hash_key=hash_key).values
+        # Top 53 bits -> uniform float in [0, 1)
+        position = (hashes >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+        
+        splits = np.where(
+            position < test_size, 'test',
+            np.where(position < test_size + validation_size, 'validation', 'train')
+        )
+        return pd.Series(splits, index=df.index, name='split')
+    
+    except KeyError as e:
+        logger.error(f"Split key column missing: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error assigning splits: {e}")
+        raise
+    
+def check_stratification(strata: pd.Series, splits: pd.Series, targets: dict, tolerance: float) -> pd.DataFrame:
+    """Check that every stratum received its target split fractions.
+    
+    Hash assignment keeps each row's split stable, so strata are balanced
+    only up to sampling noise. A drift above `tolerance` is logged as a
+    warning; a drift that is also beyond three standard deviations of that
+    noise cannot come from uniform hashing (e.g. a key shared by a whole
+    stratum) and fails the split.
+    
+    Args:
+        strata (pd.Series): Stratum value per row
+        splits (pd.Series): Split name per row
+        targets (dict): Target fraction per split name
+        tolerance (float): Allowed absolute drift per stratum and split
+        
+    Returns:
+        pd.DataFrame: Observed fraction per stratum (rows) and split (columns)
+    """
+    fractions = pd.crosstab(strata, splits, normalize='index').reindex(columns=list(targets), fill_value=0.0)
+    sizes = strata.value_counts()
+    logger.debug(f"Split fractions per '{strata.name}':\n{fractions.round(4)}")
+    
+    for stratum, row in fractions.iterrows():
+        n = sizes[stratum]
+        for split, target in targets.items():
+            drift = abs(row[split] - target)
+            if drift <= tolerance:
+                continue
+            noise = 3 * np.sqrt(target * (1 - target) / n)
+            message = (f"Stratum {strata.name}={stratum!r} ({n} rows): {split} fraction "
+                       f"{row[split]:.4f} vs target {target:.4f}")
+            if drift > tolerance + noise:
+                raise ValueError(f"{message} is beyond sampling noise; check split_data.key_column")
+            logger.warning(f"{message} exceeds tolerance {tolerance} (within sampling noise)")
+    return fractions
+    
+def split_data(df: pd.DataFrame, key_column: str, test_size: float, validation_size: float,
+               random_state: int, stratify_column: str = None, batch_size: int = None,
+               stratify_tolerance: float = 0.02) -> tuple:
+    """Split data into train, validation and test sets by stable key hashing.
+    
+    Rows are hashed independently, so no row ever moves between splits.
+    With `stratify_column` set, each stratum's split fractions are checked
+    against the targets (see `check_stratification`).
+    
+    Args:
+        df (pd.DataFrame): Input dataframe
+        key_column (str): Column used as the stable row key
+        test_size (float): Fraction of rows for the test set
+        validation_size (float): Fraction of rows for the validation set
+        random_state (int): Seed mixed into the hash
+        stratify_column (str): Optional column whose strata are checked
+        batch_size (int): Optional chunk size; results do not depend on it
+        stratify_tolerance (float): Allowed per-stratum drift from the target fractions
+        
+    Returns:
+        tuple: (train_data, validation_data, test_data)
+    """
+    try:
+        if batch_size:
+            splits = pd.concat([
+                assign_splits(df.iloc[start:start + batch_size], key_column, test_size, validation_size, random_state)
+                for start in range(0, len(df), batch_size)
+            ]) if len(df) else pd.Series([], index=df.index, dtype=object)
+        else:
+            splits = assign_splits(df, key_column, test_size, validation_size, random_state)
+        
+        if stratify_column:
+            targets = {'train': 1 - test_size - validation_size, 'validation': validation_size, 'test': test_size}
+            check_stratification(df[stratify_column], splits, targets, stratify_tolerance)
+        
+        train_data = df[splits.values == 'train']
+        validation_data = df[splits.values == 'validation']
+        test_data = df[splits.values == 'test']
+        
+        logger.debug(
+            f"Data split -> train: {len(train_data)}, validation: {len(validation_data)}, test: {len(test_data)}"
+        )
+        return train_data, validation_data, test_data
+    
+    except Exception as e:
+        logger.error(f"Error splitting data: {e}")
+        raise
+    
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str,
+              validation_data: pd.DataFrame = None) -> None:
+    """Save train, validation and test data to CSV files.
     
     Args:
         train_data (pd.DataFrame): Training data
         test_data (pd.DataFrame): Testing data
         data_path (str): Base directory path to save data
+        validation_data (pd.DataFrame): Optional validation data
     """
     try:
         raw_data_path = os.path.join(data_path, "raw")
@@ -109,6 +240,8 @@ def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str)
         # Save the train and test datasets to CSV files
         train_data.to_csv(os.path.join(raw_data_path, "train.csv"), index=False)
         test_data.to_csv(os.path.join(raw_data_path, "test.csv"), index=False)
+        if validation_data is not None:
+            validation_data.to_csv(os.path.join(raw_data_path, "validation.csv"), index=False)
         
         logger.debug(f"Data split into train and test sets and saved to {raw_data_path}")
     except Exception as e:
@@ -126,6 +259,11 @@ def main():
         # Get parameters
         test_size = params['split_data']['test_size']
         random_state = params['split_data']['random_state']  # ✅ Fixed: Define random_state
+        validation_size = params['split_data'].get('validation_size', 0.0) or 0.0
+        stratify_column = params['split_data'].get('stratify_column')
+        stratify_tolerance = params['split_data'].get('stratify_tolerance', 0.02)
+        key_column = params['split_data'].get('key_column', 'clean_comment')
+        batch_size = params['data_ingestion'].get('batch_size')
         
         # Ingest data
         df = ingest_data(data_url="https://raw.githubusercontent.com/Himanshu-1703/reddit-sentiment-analysis/refs/heads/main/data/reddit.csv")
@@ -134,15 +272,21 @@ def main():
         final_df = preprocess_data(df=df)
         
         # Split data
-        train_data, test_data = train_test_split(
-            final_df, 
-            test_size=test_size, 
-            random_state=random_state
+        train_data, validation_data, test_data = split_data(
+            final_df,
+            key_column=key_column,
+            test_size=test_size,
+            validation_size=validation_size,
+            random_state=random_state,
+            stratify_column=stratify_column,
+            stratify_tolerance=stratify_tolerance,
+            batch_size=batch_size
         )
         
         # Save data
         data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../data/')
-        save_data(train_data=train_data, test_data=test_data, data_path=data_path)
+        save_data(train_data=train_data, test_data=test_data, data_path=data_path,
+                  validation_data=validation_data)
         
         logger.info("Data ingestion pipeline completed successfully!")
     
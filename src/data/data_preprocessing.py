@@ -1,11 +1,16 @@
 import os
 import re
+import sys
 import logging
 import pandas as pd
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 import nltk
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.utils.instrumentation import instrument_stage
+from src.utils.cache import cached_stage
+
 # ─── LOGGING SETUP ──────────────────────────────────────────────────────────────
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -27,6 +32,10 @@ logger.addHandler(file_handler)
 nltk.download('wordnet', quiet=True)
 nltk.download('stopwords', quiet=True)
 
+# Preserve important negation words
+STOP_WORDS = set(stopwords.words('english')) - {'not', 'no', 'nor', 'but', 'however', 'yet', 'although'}
+LEMMATIZER = WordNetLemmatizer()
+
 # ─── PREPROCESSING FUNCTION ─────────────────────────────────────────────────────
 def preprocess_comment(comment):
     try:
@@ -42,12 +51,9 @@ def preprocess_comment(comment):
 
         tokens = comment.split()
 
-        # Preserve important negation words
-        stop_words = set(stopwords.words('english')) - {'not', 'no', 'nor', 'but', 'however', 'yet', 'although'}
-        tokens = [word for word in tokens if word not in stop_words]
+        tokens = [word for word in tokens if word not in STOP_WORDS]
 
-        lemmatizer = WordNetLemmatizer()
-        tokens = [lemmatizer.lemmatize(word) for word in tokens]
+        tokens = [LEMMATIZER.lemmatize(word) for word in tokens]
 
         cleaned = ' '.join(tokens).strip()
         return cleaned if cleaned else ""
@@ -57,6 +63,8 @@ def preprocess_comment(comment):
         return ""
 
 # ─── AUTO-DETECT TEXT COLUMN & NORMALIZE ────────────────────────────────────────
+@instrument_stage('normalize_text')
+@cached_stage('normalize_text', depends_on=(preprocess_comment, STOP_WORDS, nltk))
 def normalize_text(df: pd.DataFrame) -> pd.DataFrame:
     try:
         if df.shape[1] != 2:
@@ -94,7 +102,8 @@ def normalize_text(df: pd.DataFrame) -> pd.DataFrame:
         raise
 
 # ─── SAVE FUNCTION ──────────────────────────────────────────────────────────────
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str,
+              validation_data: pd.DataFrame = None) -> None:
     try:
         interim_path = os.path.join(data_path, 'interim')
         os.makedirs(interim_path, exist_ok=True)
@@ -104,6 +113,8 @@ def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str)
 
         train_data.to_csv(train_path, index=False)
         test_data.to_csv(test_path, index=False)
+        if validation_data is not None:
+            validation_data.to_csv(os.path.join(interim_path, 'validation_processed.csv'), index=False)
 
         logger.debug(f"Successfully saved:\n  {train_path}\n  {test_path}")
 
@@ -119,24 +130,29 @@ def main():
         raw_dir = 'data/raw'
         train_path = os.path.join(raw_dir, 'train.csv')
         test_path  = os.path.join(raw_dir, 'test.csv')
+        validation_path = os.path.join(raw_dir, 'validation.csv')
 
         if not os.path.exists(train_path):
             raise FileNotFoundError(f"Missing {train_path}")
         if not os.path.exists(test_path):
             raise FileNotFoundError(f"Missing {test_path}")
+        if not os.path.exists(validation_path):
+            raise FileNotFoundError(f"Missing {validation_path}")
 
         logger.debug("Loading raw data...")
         train_data = pd.read_csv(train_path)
         test_data  = pd.read_csv(test_path)
+        validation_data = pd.read_csv(validation_path)
 
-        logger.debug(f"Loaded → train: {train_data.shape}, test: {test_data.shape}")
+        logger.debug(f"Loaded → train: {train_data.shape}, test: {test_data.shape}, validation: {validation_data.shape}")
 
         logger.debug("Normalizing text (auto-detecting column)...")
         train_processed = normalize_text(train_data.copy())
         test_processed  = normalize_text(test_data.copy())
+        validation_processed = normalize_text(validation_data.copy())
 
         logger.debug("Saving processed data...")
-        save_data(train_processed, test_processed, data_path='data')
+        save_data(train_processed, test_processed, data_path='data', validation_data=validation_processed)
 
         logger.debug("Preprocessing pipeline completed successfully!")
 
@@ -0,0 +1,244 @@
+import re
+import logging
+import itertools
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# ─── LOGGING SETUP ──────────────────────────────────────────────────────────────
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler('token_corpus.log')
+file_handler.setLevel(logging.ERROR)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# Same tokenization as TfidfVectorizer's defaults (lowercase + token_pattern),
+# so features built from the corpus match those built from the raw strings.
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+# ─── CORPUS CONSTRUCTION ────────────────────────────────────────────────────────
+# A corpus is a dict with:
+#   vocab   : list[str], token id -> token
+#   ids     : int32 array, token ids of all documents concatenated
+#   offsets : int64 array of len(n_docs) + 1, document i is ids[offsets[i]:offsets[i+1]]
+#   labels  : optional label array aligned with the documents
+def build_token_corpora(text_splits: list, label_splits: list = None) -> list:
+    """Encode several text splits (e.g. train/test) against one shared vocabulary.
+
+    A shared vocabulary keeps every token of every split, so n-grams are never
+    formed across a dropped out-of-vocabulary token.
+    """
+    try:
+        # Tokenizing is one regex call per document; id assignment is a single
+        # vectorized factorize over all splits (ids follow first appearance)
+        split_docs = [[TOKEN_PATTERN.findall(str(text).lower()) for text in texts] for texts in text_splits]
+        tokens = np.fromiter(
+            itertools.chain.from_iterable(itertools.chain.from_iterable(split_docs)), dtype=object
+        )
+        all_ids, uniques = pd.factorize(tokens)
+
+        corpora = []
+        start = 0
+        for i, docs in enumerate(split_docs):
+            lengths = np.fromiter(map(len, docs), dtype=np.int64, count=len(docs))
+            offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            corpora.append({
+                'ids': all_ids[start:start + offsets[-1]].astype(np.int32),
+                'offsets': offsets,
+                'labels': np.asarray(label_splits[i]) if label_splits is not None else None,
+            })
+            start += offsets[-1]
+
+        vocab = list(uniques)
+        for corpus in corpora:
+            corpus['vocab'] = vocab
+        logger.debug("Token corpora built: %d splits, vocabulary size %d", len(corpora), len(vocab))
+        return corpora
+    except Exception as e:
+        logger.error("Error building token corpora: %s", e)
+        raise
+
+
+def save_token_corpus(corpus: dict, file_path: str) -> None:
+    """Save a corpus as a compressed .npz (vocabulary stored as newline-joined UTF-8)."""
+    try:
+        arrays = {
+            'vocab': np.frombuffer('\n'.join(corpus['vocab']).encode('utf-8'), dtype=np.uint8),
+            'ids': corpus['ids'],
+            'offsets': corpus['offsets'],
+        }
+        if corpus.get('labels') is not None:
+            arrays['labels'] = corpus['labels']
+        np.savez_compressed(file_path, **arrays)
+        logger.debug("Token corpus saved to %s", file_path)
+    except Exception as e:
+        logger.error("Error saving token corpus to %s: %s", file_path, e)
+        raise
+
+
+def load_token_corpus(file_path: str) -> dict:
+    """Load a corpus written by `save_token_corpus`."""
+    try:
+        with np.load(file_path, allow_pickle=False) as data:
+            vocab_bytes = data['vocab'].tobytes()
+            corpus = {
+                'vocab': vocab_bytes.decode('utf-8').split('\n') if vocab_bytes else [],
+                'ids': data['ids'],
+                'offsets': data['offsets'],
+                'labels': data['labels'] if 'labels' in data.files else None,
+            }
+        logger.debug("Token corpus loaded from %s", file_path)
+        return corpus
+    except Exception as e:
+        logger.error("Error loading token corpus from %s: %s", file_path, e)
+        raise
+
+# ─── N-GRAM FEATURES ────────────────────────────────────────────────────────────
+# An n-gram (t_0, ..., t_{n-1}) is encoded as a single int64 key:
+#   sum_{m<n} V^m + sum_k t_k * V^(n-1-k)      with V = vocabulary size
+# The first term keeps the key ranges of different n disjoint.
+def _key_offsets(base: int, max_n: int) -> list:
+    offsets = [0]
+    for n in range(1, max_n + 1):
+        offsets.append(offsets[-1] + base ** n)
+    if offsets[-1] >= np.iinfo(np.int64).max:
+        raise ValueError(f"Vocabulary of {base} tokens is too large for {max_n}-gram keys")
+    return offsets
+
+
+def _ngram_keys(corpus: dict, ngram_range: tuple) -> tuple:
+    """Return (doc_index, key) for every n-gram occurrence in the corpus."""
+    min_n, max_n = ngram_range
+    ids = corpus['ids'].astype(np.int64)
+    offsets = corpus['offsets']
+    base = max(len(corpus['vocab']), 1)
+    key_offsets = _key_offsets(base, max_n)
+
+    doc_of_token = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    docs, keys = [], []
+    for n in range(min_n, max_n + 1):
+        m = len(ids) - n + 1
+        if m <= 0:
+            continue
+        # n-gram starting at i is valid only if it ends inside the same document
+        valid = np.arange(m) + n <= offsets[doc_of_token[:m] + 1]
+        key = ids[:m].copy()
+        for k in range(1, n):
+            key = key * base + ids[k:k + m]
+        docs.append(doc_of_token[:m][valid])
+        keys.append(key[valid] + key_offsets[n - 1])
+
+    if not keys:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(docs), np.concatenate(keys)
+
+
+def _decode_key(key: int, vocab: list, key_offsets: list) -> str:
+    n = int(np.searchsorted(key_offsets, key, side='right'))
+    key -= key_offsets[n - 1]
+    base = len(vocab)
+    tokens = []
+    for _ in range(n):
+        key, token_id = divmod(key, base)
+        tokens.append(vocab[token_id])
+    return ' '.join(reversed(tokens))
+
+
+def _encode_ngram(ngram: str, vocab_index: dict, key_offsets: list) -> int:
+    tokens = ngram.split(' ')
+    key = 0
+    for token in tokens:
+        key = key * len(vocab_index) + vocab_index[token]
+    return key + key_offsets[len(tokens) - 1]
+
+
+def _count_matrix(docs: np.ndarray, cols: np.ndarray, n_docs: int, n_features: int) -> sp.csr_matrix:
+    counts = sp.csr_matrix(
+        (np.ones(len(cols), dtype=np.float64), (docs, cols)),
+        shape=(n_docs, n_features)
+    )
+    counts.sum_duplicates()
+    return counts
+
+
+def fit_tfidf_corpus(corpus: dict, max_features: int, ngram_range: tuple) -> tuple:
+    """Fit TF-IDF on a token corpus without re-tokenizing any text.
+
+    Returns a fitted `TfidfVectorizer` (usable on raw strings at serving time)
+    and the train TF-IDF matrix. Feature selection and weighting follow
+    sklearn's defaults: top `max_features` n-grams by corpus frequency (ties
+    broken alphabetically), smooth IDF and L2 row normalization.
+    """
+    try:
+        n_docs = len(corpus['offsets']) - 1
+        vocab = corpus['vocab']
+        key_offsets = _key_offsets(max(len(vocab), 1), ngram_range[1])
+
+        docs, keys = _ngram_keys(corpus, ngram_range)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = _count_matrix(docs, inverse, n_docs, len(unique_keys))
+        term_freqs = np.asarray(counts.sum(axis=0)).ravel()
+
+        # Only decode the n-grams that can make the max_features cut
+        candidates = np.arange(len(unique_keys))
+        if max_features is not None and max_features < len(unique_keys):
+            threshold = -np.partition(-term_freqs, max_features - 1)[max_features - 1]
+            candidates = np.flatnonzero(term_freqs >= threshold)
+        names = {int(c): _decode_key(int(unique_keys[c]), vocab, key_offsets) for c in candidates}
+        ranked = sorted(candidates, key=lambda c: (-term_freqs[c], names[int(c)]))[:max_features]
+        selected = sorted(ranked, key=lambda c: names[int(c)])
+
+        X_counts = counts[:, selected]
+        doc_freqs = np.bincount(X_counts.indices, minlength=len(selected))
+        idf = np.log((1 + n_docs) / (1 + doc_freqs)) + 1
+
+        vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=ngram_range)
+        vectorizer.vocabulary_ = {names[int(c)]: i for i, c in enumerate(selected)}
+        vectorizer.idf_ = idf
+
+        X_tfidf = normalize(X_counts.multiply(idf).tocsr(), norm='l2', copy=False)
+        logger.debug("TF-IDF fitted from token corpus. Shape: %s", X_tfidf.shape)
+        return vectorizer, X_tfidf
+    except Exception as e:
+        logger.error("Error fitting TF-IDF from token corpus: %s", e)
+        raise
+
+
+def transform_corpus(vectorizer: TfidfVectorizer, corpus: dict) -> sp.csr_matrix:
+    """Apply a fitted vectorizer to a token corpus (equivalent to `vectorizer.transform`)."""
+    try:
+        n_docs = len(corpus['offsets']) - 1
+        if not vectorizer.vocabulary_:
+            return sp.csr_matrix((n_docs, 0), dtype=np.float64)
+        vocab_index = {token: i for i, token in enumerate(corpus['vocab'])}
+        key_offsets = _key_offsets(max(len(vocab_index), 1), vectorizer.ngram_range[1])
+
+        # Map each feature to its key; features with unseen tokens can never match
+        feature_keys = np.full(len(vectorizer.vocabulary_), -1, dtype=np.int64)
+        for ngram, column in vectorizer.vocabulary_.items():
+            if all(token in vocab_index for token in ngram.split(' ')):
+                feature_keys[column] = _encode_ngram(ngram, vocab_index, key_offsets)
+        order = np.argsort(feature_keys)
+        sorted_keys = feature_keys[order]
+
+        docs, keys = _ngram_keys(corpus, vectorizer.ngram_range)
+        positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        matched = sorted_keys[positions] == keys
+
+        counts = _count_matrix(docs[matched], order[positions[matched]], n_docs, len(feature_keys))
+        return normalize(counts.multiply(vectorizer.idf_).tocsr(), norm='l2', copy=False)
+    except Exception as e:
+        logger.error("Error transforming token corpus: %s", e)
+        raise
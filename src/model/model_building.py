@@ -1,12 +1,20 @@
 import os
+import sys
 import yaml
 import pickle
 import logging
 import numpy as np
 import pandas as pd
+import sklearn
 import lightgbm as lgb
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.utils.instrumentation import instrument_stage
+from src.utils.cache import cached_stage
+from src.data import token_corpus
+from src.data.token_corpus import load_token_corpus, fit_tfidf_corpus, transform_corpus
+
 
 # ─── LOGGING SETUP ──────────────────────────────────────────────────────────────
 logger = logging.getLogger(__name__)
@@ -56,19 +64,30 @@ def load_data(data_path: str) -> pd.DataFrame:
         logger.error("Unexpected error: %s", e)
         raise
         
-def apply_tfidf(train_data: pd.DataFrame, test_data: pd.DataFrame, max_features: int, ngram_range: tuple) -> tuple:
+@cached_stage('fit_tfidf', depends_on=(sklearn,))
+def fit_tfidf(X_train: np.ndarray, X_test: np.ndarray, X_val: np.ndarray, max_features: int, ngram_range: tuple) -> tuple:
+    """Fit the TF-IDF vectorizer on train text and transform all splits."""
+    vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=ngram_range)
+    X_train_tfidf = vectorizer.fit_transform(X_train)
+    X_test_tfidf = vectorizer.transform(X_test)
+    X_val_tfidf = vectorizer.transform(X_val)
+    return vectorizer, X_train_tfidf, X_test_tfidf, X_val_tfidf
+
+@instrument_stage('apply_tfidf', rows=lambda result, train_data, test_data, val_data, *a, **kw: len(train_data) + len(test_data) + len(val_data))
+def apply_tfidf(train_data: pd.DataFrame, test_data: pd.DataFrame, val_data: pd.DataFrame,
+                max_features: int, ngram_range: tuple) -> tuple:
     """Apply TF-IDF vectorization to text data."""
     try:
-        vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=ngram_range)
-        
         X_train = train_data['clean_comment'].values  # Fixed column name
         y_train = train_data['category'].values
         
         X_test = test_data['clean_comment'].values  # Fixed: was incomplete
         y_test = test_data['category'].values
         
-        X_train_tfidf = vectorizer.fit_transform(X_train)
-        X_test_tfidf = vectorizer.transform(X_test)
+        X_val = val_data['clean_comment'].values
+        y_val = val_data['category'].values
+        
+        vectorizer, X_train_tfidf, X_test_tfidf, X_val_tfidf = fit_tfidf(X_train, X_test, X_val, max_features, ngram_range)
         
         logger.debug(f"TF-IDF transformation completed. Train shape: {X_train_tfidf.shape}")
         
@@ -76,15 +95,53 @@ def apply_tfidf(train_data: pd.DataFrame, test_data: pd.DataFrame, max_features:
             pickle.dump(vectorizer, f)
             logger.debug("TF-IDF vectorizer saved to tfidf_vectorizer.pkl")
             
-        return X_train_tfidf, y_train, X_test_tfidf, y_test
+        return X_train_tfidf, y_train, X_test_tfidf, y_test, X_val_tfidf, y_val
             
     except Exception as e:
         logger.error("Error in TF-IDF vectorization: %s", e)
         raise
     
+@cached_stage('fit_tfidf_corpus', depends_on=(token_corpus, sklearn, np))
+def fit_tfidf_from_corpus(train_corpus: dict, test_corpus: dict, val_corpus: dict,
+                          max_features: int, ngram_range: tuple) -> tuple:
+    """Fit TF-IDF on the train token corpus and transform all splits."""
+    vectorizer, X_train_tfidf = fit_tfidf_corpus(train_corpus, max_features, ngram_range)
+    X_test_tfidf = transform_corpus(vectorizer, test_corpus)
+    X_val_tfidf = transform_corpus(vectorizer, val_corpus)
+    return vectorizer, X_train_tfidf, X_test_tfidf, X_val_tfidf
+
+@instrument_stage('apply_tfidf', rows=lambda result, *a, **kw: result[0].shape[0] + result[2].shape[0] + result[4].shape[0])
+def apply_tfidf_corpus(train_corpus: dict, test_corpus: dict, val_corpus: dict,
+                       max_features: int, ngram_range: tuple) -> tuple:
+    """Apply TF-IDF vectorization to token-ID corpora without re-tokenizing text."""
+    try:
+        vectorizer, X_train_tfidf, X_test_tfidf, X_val_tfidf = fit_tfidf_from_corpus(
+            train_corpus, test_corpus, val_corpus, max_features, ngram_range
+        )
+        
+        logger.debug(f"TF-IDF transformation from token corpus completed. Train shape: {X_train_tfidf.shape}")
+        
+        with open(os.path.join(get_root_directory(), 'tfidf_vectorizer.pkl'), 'wb') as f:
+            pickle.dump(vectorizer, f)
+            logger.debug("TF-IDF vectorizer saved to tfidf_vectorizer.pkl")
+            
+        return (X_train_tfidf, train_corpus['labels'], X_test_tfidf, test_corpus['labels'],
+                X_val_tfidf, val_corpus['labels'])
+            
+    except Exception as e:
+        logger.error("Error in TF-IDF vectorization from token corpus: %s", e)
+        raise
+    
+@instrument_stage('train_lgbm', rows=lambda result, X_train, *a, **kw: X_train.shape[0])
+@cached_stage('train_lgbm', depends_on=(lgb, sklearn))
 def train_lgbm(X_train: np.ndarray, y_train: np.ndarray, learning_rate: float,
-               max_depth: int, n_estimators: int) -> lgb.LGBMClassifier:
-    """Train a LightGBM model."""
+               max_depth: int, n_estimators: int, X_val: np.ndarray = None, y_val: np.ndarray = None,
+               early_stopping_rounds: int = None) -> lgb.LGBMClassifier:
+    """Train a LightGBM model.
+    
+    With a non-empty validation set, it is used as the eval set and training
+    stops once its multi_logloss has not improved for `early_stopping_rounds`.
+    """
     try:
         best_model = lgb.LGBMClassifier(
             objective='multiclass',
@@ -99,7 +156,12 @@ def train_lgbm(X_train: np.ndarray, y_train: np.ndarray, learning_rate: float,
             n_estimators=n_estimators
         )
         
-        best_model.fit(X_train, y_train)        
+        if X_val is not None and X_val.shape[0] > 0:
+            callbacks = [lgb.early_stopping(early_stopping_rounds, verbose=False)] if early_stopping_rounds else []
+            best_model.fit(X_train, y_train, eval_set=[(X_val, y_val)], callbacks=callbacks)
+            logger.debug("Best iteration on validation set: %s", best_model.best_iteration_)
+        else:
+            best_model.fit(X_train, y_train)
         logger.debug("LightGBM model training completed.")
         return best_model
         
@@ -134,18 +196,32 @@ def main():
         learning_rate = params['model_building']['learning_rate']        # ✅ Fixed brackets
         max_depth = params['model_building']['max_depth']                # ✅ Fixed brackets
         n_estimators = params['model_building']['n_estimators']
-        
-        # Load data
-        train_data = load_data(os.path.join(root_dir, 'data/interim/train_processed.csv'))
-        test_data = load_data(os.path.join(root_dir, 'data/interim/test_processed.csv'))
-        
-        # Apply TF-IDF
-        X_train_tfidf, y_train, X_test_tfidf, y_test = apply_tfidf(
-            train_data, test_data, max_features, ngram_range
-        )
-        
-        # Train model
-        best_model = train_lgbm(X_train_tfidf, y_train, learning_rate, max_depth, n_estimators)
+        early_stopping_rounds = params['model_building'].get('early_stopping_rounds')
+        
+        use_token_corpus = params.get('preprocessing', {}).get('token_corpus', False)
+        
+        if use_token_corpus:
+            # Load token-ID corpora and apply TF-IDF directly on them
+            train_corpus = load_token_corpus(os.path.join(root_dir, 'data/interim/train_corpus.npz'))
+            test_corpus = load_token_corpus(os.path.join(root_dir, 'data/interim/test_corpus.npz'))
+            val_corpus = load_token_corpus(os.path.join(root_dir, 'data/interim/validation_corpus.npz'))
+            X_train_tfidf, y_train, X_test_tfidf, y_test, X_val_tfidf, y_val = apply_tfidf_corpus(
+                train_corpus, test_corpus, val_corpus, max_features, ngram_range
+            )
+        else:
+            # Load data
+            train_data = load_data(os.path.join(root_dir, 'data/interim/train_processed.csv'))
+            test_data = load_data(os.path.join(root_dir, 'data/interim/test_processed.csv'))
+            val_data = load_data(os.path.join(root_dir, 'data/interim/validation_processed.csv'))
+            
+            # Apply TF-IDF
+            X_train_tfidf, y_train, X_test_tfidf, y_test, X_val_tfidf, y_val = apply_tfidf(
+                train_data, test_data, val_data, max_features, ngram_range
+            )
+        
+        # Train model, early-stopping on the validation split
+        best_model = train_lgbm(X_train_tfidf, y_train, learning_rate, max_depth, n_estimators,
+                                X_val_tfidf, y_val, early_stopping_rounds)
         
         # Save model
         save_model(best_model, os.path.join(root_dir, 'lgbm_model.pkl'))
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import yaml
 import pickle
@@ -9,13 +10,22 @@ import numpy as np
 import pandas as pd
 import mlflow
 import mlflow.sklearn
+import sklearn
 import seaborn as sns
 import matplotlib.pyplot as plt
 
 from mlflow.models import infer_signature
+from mlflow.tracking import MlflowClient
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.utils.instrumentation import (
+    instrument_stage, profile_stage, load_stage_metrics, log_stage_metrics_to_mlflow
+)
+from src.utils.cache import hash_files, hash_inputs, function_fingerprint, load_cached, store_cached
+from src.data.token_corpus import load_token_corpus, transform_corpus
+
 # ─── LOGGING SETUP ──────────────────────────────────────────────────────────────
 logger = logging.getLogger(__name__)  
 logger.setLevel(logging.DEBUG)
@@ -33,6 +43,9 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
+# Pipeline scripts whose stage_metrics/<script>.json are logged with the evaluation run
+UPSTREAM_STAGES = ('data_ingestion', 'data_preprocessing', 'build_token_corpus', 'model_building')
+
 def load_data(file_path: str) -> pd.DataFrame:
     """Load dataset from a CSV file."""
     try:
@@ -77,6 +90,7 @@ def load_params(params_path: str) -> dict:
         logger.error("Unexpected error %s: %s", params_path, e)
         raise
 
+@instrument_stage('evaluate_model', rows=lambda result, model, X_test, *a, **kw: X_test.shape[0])
 def evaluate_model(model, X_test: np.ndarray, y_test: np.ndarray):
     """Evaluate the model and generate evaluation metrics and plots."""
     try:
@@ -130,6 +144,14 @@ def save_model_info(run_id: str, model_path: str, file_path: str) -> None:
         logger.error("Error saving model information to %s: %s", file_path, e)
         raise
     
+def run_exists(run_id: str) -> bool:
+    """Check that an MLflow run is still available (and not deleted) on the tracking server."""
+    try:
+        return MlflowClient().get_run(run_id).info.lifecycle_stage != 'deleted'
+    except Exception as e:
+        logger.warning("MLflow run %s is not available: %s", run_id, e)
+        return False
+    
 def main():
     """Main function to evaluate the model."""
     
@@ -158,44 +180,85 @@ def main():
                 else:
                     mlflow.log_param(key, value)
                 
-            # Load model and vectorizer
-            model = load_model(os.path.join(root_dir, 'lgbm_model.pkl'))
-            vectorizer = load_vectorizer(os.path.join(root_dir, 'tfidf_vectorizer.pkl'))
-            
-            # Load test data
-            test_data = load_data(os.path.join(root_dir, 'data/interim/test_processed.csv'))
+            model_file = os.path.join(root_dir, 'lgbm_model.pkl')
+            vectorizer_file = os.path.join(root_dir, 'tfidf_vectorizer.pkl')
+            # With the token corpus enabled the test CSV is not read at all
+            use_token_corpus = params.get('preprocessing', {}).get('token_corpus', False)
+            if use_token_corpus:
+                test_file = os.path.join(root_dir, 'data/interim/test_corpus.npz')
+            else:
+                test_file = os.path.join(root_dir, 'data/interim/test_processed.csv')
             
-            # Transform test data
-            X_test_tfidf = vectorizer.transform(test_data['clean_comment'].values)
-            y_test = test_data['category'].values
-            
-            # Create input example for MLflow model signature
-            input_example = pd.DataFrame(
-                X_test_tfidf[:5].toarray(), 
-                columns=vectorizer.get_feature_names_out()
+            # Model, vectorizer, test data and evaluation code unchanged -> reuse the logged model and report.
+            # Runs only exist on one tracking server/experiment, so those are part of the key too.
+            artifacts_key = hash_inputs(
+                mlflow.get_tracking_uri(),
+                run.info.experiment_id,
+                hash_files(model_file, vectorizer_file, test_file),
+                function_fingerprint(evaluate_model, depends_on=(sklearn,))
             )
+            hit, cached = load_cached('model_evaluation', artifacts_key)
+            if hit and not run_exists(cached['run_id']):
+                logger.info("Cached run %s no longer exists, evaluating again", cached['run_id'])
+                hit = False
             
-            # Infer signature
-            signature = infer_signature(input_example, model.predict(X_test_tfidf[:5]))
-            
-            # Log model to DagsHub MLflow
-            mlflow.sklearn.log_model(
-                model, 
-                "model", 
-                signature=signature, 
-                input_example=input_example
-            )
-            
-            # Save run info locally for DVC or other tools
-            artifact_path = mlflow.get_artifact_uri()
-            model_path = f'{artifact_path}/model'
-            save_model_info(run.info.run_id, model_path, 'experiment_info.json')
-            
-            # Log vectorizer as artifact
-            mlflow.log_artifact(os.path.join(root_dir, 'tfidf_vectorizer.pkl'))
-            
-            # Evaluate model
-            report, cm = evaluate_model(model, X_test_tfidf, y_test)
+            if hit:
+                logger.info("Artifacts unchanged, reusing model logged in run %s", cached['run_id'])
+                mlflow.set_tag("reused_model_run_id", cached['run_id'])
+                save_model_info(cached['run_id'], cached['model_path'], 'experiment_info.json')
+                # Recorded like the cached stages upstream, so the stage's metrics file is always written
+                with profile_stage('evaluate_model') as stats:
+                    report, cm = cached['report'], cached['cm']
+                    stats['rows'] = int(cm.sum())
+            else:
+                # Load model and vectorizer
+                model = load_model(model_file)
+                vectorizer = load_vectorizer(vectorizer_file)
+                
+                # Load and transform test data
+                if use_token_corpus:
+                    test_corpus = load_token_corpus(test_file)
+                    X_test_tfidf = transform_corpus(vectorizer, test_corpus)
+                    y_test = test_corpus['labels']
+                else:
+                    test_data = load_data(test_file)
+                    X_test_tfidf = vectorizer.transform(test_data['clean_comment'].values)
+                    y_test = test_data['category'].values
+                
+                # Create input example for MLflow model signature
+                input_example = pd.DataFrame(
+                    X_test_tfidf[:5].toarray(), 
+                    columns=vectorizer.get_feature_names_out()
+                )
+                
+                # Infer signature
+                signature = infer_signature(input_example, model.predict(X_test_tfidf[:5]))
+                
+                # Log model to DagsHub MLflow
+                mlflow.sklearn.log_model(
+                    model, 
+                    "model", 
+                    signature=signature, 
+                    input_example=input_example
+                )
+                
+                # Save run info locally for DVC or other tools
+                artifact_path = mlflow.get_artifact_uri()
+                model_path = f'{artifact_path}/model'
+                save_model_info(run.info.run_id, model_path, 'experiment_info.json')
+                
+                # Log vectorizer as artifact
+                mlflow.log_artifact(vectorizer_file)
+                
+                # Evaluate model
+                report, cm = evaluate_model(model, X_test_tfidf, y_test)
+                
+                store_cached('model_evaluation', artifacts_key, {
+                    'run_id': run.info.run_id,
+                    'model_path': model_path,
+                    'report': report,
+                    'cm': cm
+                })
             
             # Log metrics
             for label, metrics in report.items():
@@ -211,6 +274,9 @@ def main():
             mlflow.set_tag("model_type", "LightGBM")
             mlflow.set_tag("dataset", "YouTube Sentiment Analysis")
             
+            # Log timing/memory of the upstream stages (their metrics files are deps of this stage)
+            log_stage_metrics_to_mlflow(load_stage_metrics(UPSTREAM_STAGES))
+            
             logger.info("Model evaluation pipeline completed successfully!")
             
         except Exception as e:
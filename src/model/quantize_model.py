@@ -0,0 +1,220 @@
+import os
+import sys
+import copy
+import json
+import yaml
+import pickle
+import logging
+import subprocess
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.utils.instrumentation import instrument_stage
+from src.model.quantized_lgbm import QuantizedLGBM
+
+
+# ─── LOGGING SETUP ──────────────────────────────────────────────────────────────
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler('quantize_model.log')
+file_handler.setLevel(logging.ERROR)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# Candidate precisions, most compact first: (leaf values, thresholds)
+PRECISIONS = {
+    'int8': ('int8', np.float16),
+    'float16': (np.float16, np.float16),
+    'float32': (np.float32, np.float32),
+}
+
+# ─── VECTORIZER ─────────────────────────────────────────────────────────────────
+def quantize_vectorizer(vectorizer: TfidfVectorizer) -> TfidfVectorizer:
+    """Copy of the vectorizer with float16 IDF weights and no fit-time leftovers."""
+    quantized = copy.deepcopy(vectorizer)
+    # Pruned-term set kept by older sklearn versions; not needed for transform
+    if hasattr(quantized, 'stop_words_'):
+        del quantized.stop_words_
+    quantized.vocabulary_ = {term: int(index) for term, index in quantized.vocabulary_.items()}
+    quantized.idf_ = quantized.idf_.astype(np.float16)
+    return quantized
+
+# ─── HELPERS ────────────────────────────────────────────────────────────────────
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug("Parameters retrieved from %s", params_path)
+        return params
+    except Exception as e:
+        logger.error("Unexpected error %s: %s", params_path, e)
+        raise
+
+def load_pickle(file_path: str):
+    """Load a pickled object."""
+    try:
+        with open(file_path, 'rb') as file:
+            obj = pickle.load(file)
+        logger.debug("Loaded %s", file_path)
+        return obj
+    except Exception as e:
+        logger.error("Error loading %s: %s", file_path, e)
+        raise
+
+def measure_load_rss_mb(file_path: str) -> float:
+    """Resident memory (MB) a fresh interpreter gains by loading an artifact."""
+    if file_path.endswith('.npz'):
+        loader = "src.model.quantized_lgbm.QuantizedLGBM.load(path)"
+    else:
+        loader = "pickle.load(open(path, 'rb'))"
+    code = (
+        "import os, sys, pickle, resource, numpy, sklearn.feature_extraction.text, lightgbm\n"
+        f"sys.path.insert(0, {get_root_directory()!r})\n"
+        "import src.model.quantized_lgbm\n"
+        "def rss():\n"
+        "    if os.path.exists('/proc/self/statm'):\n"
+        "        with open('/proc/self/statm') as f:\n"
+        "            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')\n"
+        "    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "    return peak if sys.platform == 'darwin' else peak * 1024\n"
+        f"path = {file_path!r}\n"
+        "before = rss()\n"
+        f"obj = {loader}\n"
+        "print(rss() - before)\n"
+    )
+    try:
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        rss_delta = int(output.stdout.strip().splitlines()[-1])
+        return round(rss_delta / (1024 * 1024), 3)
+    except Exception as e:
+        logger.error("Could not measure resident memory for %s: %s", file_path, e)
+        return float('nan')
+
+def get_root_directory() -> str:
+    """Get the root directory of the project."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(current_dir, '..', '..'))
+
+# ─── QUANTIZATION ───────────────────────────────────────────────────────────────
+@instrument_stage('quantize_model', rows=lambda result, model, vectorizer, test_data, *a, **kw: len(test_data))
+def quantize_artifacts(model, vectorizer: TfidfVectorizer, test_data: pd.DataFrame,
+                       precisions: list, max_accuracy_drop: float) -> tuple:
+    """Pick the most compact precision whose accuracy loss stays within tolerance.
+
+    Falls back to the float32 export when no candidate is within tolerance,
+    so replicas always have a model to load.
+
+    Returns:
+        tuple: (quantized model, quantized vectorizer, per-precision results)
+    """
+    # Imported lazily: model_evaluation pulls in MLflow/DagsHub at import time
+    from src.model.model_evaluation import evaluate_model
+
+    try:
+        # Call the undecorated function so the pipeline's evaluate_model timing is kept
+        evaluate = getattr(evaluate_model, '__wrapped__', evaluate_model)
+        texts = test_data['clean_comment'].values
+        y_test = test_data['category'].values
+
+        baseline_report, _ = evaluate(model, vectorizer.transform(texts), y_test)
+        q_vectorizer = quantize_vectorizer(vectorizer)
+        X_test_q = q_vectorizer.transform(texts)
+
+        results = {'baseline': {
+            'accuracy': baseline_report['accuracy'],
+            'macro_f1': baseline_report['macro avg']['f1-score'],
+        }}
+        chosen = None
+        candidates = list(precisions) + ([] if 'float32' in precisions else ['float32'])
+        for name in candidates:
+            leaf_dtype, threshold_dtype = PRECISIONS[name]
+            q_model = QuantizedLGBM.from_lgbm(model, leaf_dtype, threshold_dtype)
+            report, _ = evaluate(q_model, X_test_q, y_test)
+            drop = baseline_report['accuracy'] - report['accuracy']
+            results[name] = {
+                'accuracy': report['accuracy'],
+                'macro_f1': report['macro avg']['f1-score'],
+                'accuracy_drop': drop,
+                'accepted': bool(drop <= max_accuracy_drop),
+            }
+            logger.debug("Precision %s: accuracy %.4f (drop %.4f)", name, report['accuracy'], drop)
+            if chosen is None and drop <= max_accuracy_drop:
+                chosen = (name, q_model)
+
+        if chosen is None:
+            logger.warning("No precision within %.4f accuracy drop; exporting float32", max_accuracy_drop)
+            chosen = ('float32', QuantizedLGBM.from_lgbm(model, *PRECISIONS['float32']))
+        results['selected'] = chosen[0]
+        results['within_tolerance'] = results[chosen[0]]['accepted']
+        return chosen[1], q_vectorizer, results
+
+    except Exception as e:
+        logger.error("Error quantizing artifacts: %s", e)
+        raise
+
+def main():
+    try:
+        root_dir = get_root_directory()
+        params = load_params(os.path.join(root_dir, 'params.yaml'))
+        quantization = params.get('quantization', {})
+        precisions = quantization.get('precisions', list(PRECISIONS))
+        max_accuracy_drop = quantization.get('max_accuracy_drop', 0.005)
+
+        model_path = os.path.join(root_dir, 'lgbm_model.pkl')
+        vectorizer_path = os.path.join(root_dir, 'tfidf_vectorizer.pkl')
+        q_model_path = os.path.join(root_dir, 'lgbm_model_quantized.npz')
+        q_vectorizer_path = os.path.join(root_dir, 'tfidf_vectorizer_quantized.pkl')
+
+        model = load_pickle(model_path)
+        vectorizer = load_pickle(vectorizer_path)
+        test_data = pd.read_csv(os.path.join(root_dir, 'data/interim/test_processed.csv'))
+        test_data.fillna('', inplace=True)
+
+        q_model, q_vectorizer, results = quantize_artifacts(
+            model, vectorizer, test_data, precisions, max_accuracy_drop
+        )
+
+        with open(q_vectorizer_path, 'wb') as f:
+            pickle.dump(q_vectorizer, f)
+        q_model.save(q_model_path)
+
+        sizes = {
+            'model_bytes': os.path.getsize(model_path),
+            'vectorizer_bytes': os.path.getsize(vectorizer_path),
+            'quantized_model_bytes': os.path.getsize(q_model_path),
+            'quantized_vectorizer_bytes': os.path.getsize(q_vectorizer_path),
+            'model_rss_mb': measure_load_rss_mb(model_path),
+            'vectorizer_rss_mb': measure_load_rss_mb(vectorizer_path),
+            'quantized_model_rss_mb': measure_load_rss_mb(q_model_path),
+            'quantized_vectorizer_rss_mb': measure_load_rss_mb(q_vectorizer_path),
+        }
+        results['artifacts'] = sizes
+
+        with open(os.path.join(root_dir, 'quantization_report.json'), 'w') as f:
+            json.dump(results, f, indent=4, default=float)
+
+        logger.info(
+            "Quantization completed (%s): model %s -> %s bytes, vectorizer %s -> %s bytes",
+            results['selected'], sizes['model_bytes'], sizes['quantized_model_bytes'],
+            sizes['vectorizer_bytes'], sizes['quantized_vectorizer_bytes']
+        )
+
+    except Exception as e:
+        logger.error("Error in quantization pipeline: %s", e)
+        print(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Numpy-only tree ensemble for serving quantized LightGBM exports.
+
+Kept free of pipeline imports (logging handlers, yaml, pandas, lightgbm)
+so serving replicas only need numpy to load `lgbm_model_quantized.npz`.
+"""
+import numpy as np
+
+# Same zero tolerance LightGBM uses for missing_type == 'Zero'
+ZERO_THRESHOLD = 1e-35
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+MISSING_TYPES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+
+# ─── QUANTIZED TREE ENSEMBLE ────────────────────────────────────────────────────
+class QuantizedLGBM:
+    """Array-backed, reduced-precision copy of a multiclass LGBMClassifier.
+
+    All trees are flattened into shared node/leaf arrays. Child indices >= 0
+    point at internal nodes, negative values encode leaf `~child`. Leaf values
+    are stored as float16/float32, or as int8 codes with a single scale.
+    """
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        self.classes_ = arrays['classes']
+        self.num_class = int(arrays['num_class'])
+        self.leaf_scale = float(arrays['leaf_scale']) if 'leaf_scale' in arrays else 1.0
+
+    @classmethod
+    def from_lgbm(cls, model, leaf_dtype, threshold_dtype) -> 'QuantizedLGBM':
+        """Flatten a fitted LGBMClassifier into quantized arrays."""
+        dump = model.booster_.dump_model()
+        features, thresholds, lefts, rights, default_left, missing = [], [], [], [], [], []
+        leaf_values, roots = [], []
+
+        def flatten(node) -> int:
+            if 'leaf_value' in node:
+                leaf_values.append(node['leaf_value'])
+                return ~(len(leaf_values) - 1)
+            if node['decision_type'] != '<=':
+                raise ValueError(f"Unsupported decision type: {node['decision_type']}")
+            index = len(features)
+            features.append(node['split_feature'])
+            thresholds.append(node['threshold'])
+            default_left.append(node['default_left'])
+            missing.append(MISSING_TYPES[node['missing_type']])
+            lefts.append(0)
+            rights.append(0)
+            lefts[index] = flatten(node['left_child'])
+            rights[index] = flatten(node['right_child'])
+            return index
+
+        for tree in dump['tree_info']:
+            roots.append(flatten(tree['tree_structure']))
+
+        leaf_values = np.asarray(leaf_values, dtype=np.float64)
+        # LightGBM uses +/-max double as 'always left/right' thresholds; store them
+        # as +/-inf instead of letting the narrowing cast overflow
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        out_of_range = np.abs(thresholds) > np.finfo(threshold_dtype).max
+        thresholds[out_of_range] = np.sign(thresholds[out_of_range]) * np.inf
+        arrays = {
+            'classes': np.asarray(model.classes_),
+            'num_class': np.int64(dump['num_tree_per_iteration']),
+            'roots': np.asarray(roots, dtype=np.int32),
+            'features': np.asarray(features, dtype=np.int32),
+            'thresholds': np.asarray(thresholds, dtype=threshold_dtype),
+            'left': np.asarray(lefts, dtype=np.int32),
+            'right': np.asarray(rights, dtype=np.int32),
+            'default_left': np.asarray(default_left, dtype=bool),
+            'missing_type': np.asarray(missing, dtype=np.int8),
+        }
+        if leaf_dtype == 'int8':
+            scale = np.abs(leaf_values).max() / 127 if len(leaf_values) else 1.0
+            scale = scale or 1.0
+            arrays['leaf_values'] = np.round(leaf_values / scale).astype(np.int8)
+            arrays['leaf_scale'] = np.float64(scale)
+        else:
+            arrays['leaf_values'] = leaf_values.astype(leaf_dtype)
+        return cls(arrays)
+
+    def _raw_scores(self, X, chunk_size: int = 1024) -> np.ndarray:
+        a = self.arrays
+        n_rows = X.shape[0]
+        n_trees = len(a['roots'])
+        scores = np.zeros((n_rows, self.num_class), dtype=np.float64)
+        tree_class = np.arange(n_trees) % self.num_class
+
+        for start in range(0, n_rows, chunk_size):
+            chunk = X[start:start + chunk_size]
+            dense = chunk.toarray() if hasattr(chunk, 'toarray') else np.asarray(chunk)
+            dense = dense.astype(np.float64, copy=False)
+            n = dense.shape[0]
+
+            # Walk every tree for every row at once, one depth level per iteration
+            nodes = np.broadcast_to(a['roots'], (n, n_trees)).copy()
+            rows = np.broadcast_to(np.arange(n)[:, None], (n, n_trees))
+            active = nodes >= 0
+            while active.any():
+                idx = nodes[active]
+                values = dense[rows[active], a['features'][idx]]
+                missing_type = a['missing_type'][idx]
+                is_nan = np.isnan(values)
+                values = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, values)
+                is_missing = ((missing_type == MISSING_ZERO) & (np.abs(values) <= ZERO_THRESHOLD)) | \
+                             ((missing_type == MISSING_NAN) & is_nan)
+                go_left = np.where(is_missing, a['default_left'][idx], values <= a['thresholds'][idx])
+                nodes[active] = np.where(go_left, a['left'][idx], a['right'][idx])
+                active = nodes >= 0
+
+            # Values are only widened to float64 here, never kept at full precision
+            leaf_scores = a['leaf_values'][~nodes].astype(np.float64) * self.leaf_scale
+            for k in range(self.num_class):
+                scores[start:start + n, k] = leaf_scores[:, tree_class == k].sum(axis=1)
+        return scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        scores = self._raw_scores(X)
+        scores -= scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self._raw_scores(X), axis=1)]
+
+    def save(self, file_path: str) -> None:
+        np.savez_compressed(file_path, **self.arrays)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'QuantizedLGBM':
+        with np.load(file_path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
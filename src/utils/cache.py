@@ -0,0 +1,240 @@
+import os
+import pickle
+import hashlib
+import types
+import inspect
+import logging
+import functools
+
+import numpy as np
+import pandas as pd
+
+
+# ─── LOGGING SETUP ──────────────────────────────────────────────────────────────
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler('stage_cache.log')
+file_handler.setLevel(logging.ERROR)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+# STAGE_CACHE     : set to 0/false to bypass the cache entirely
+# STAGE_CACHE_DIR : where cached outputs are stored (default: .stage_cache/)
+# STAGE_CACHE_MAX_MB : size cap; least recently used entries are evicted (default: 2048)
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_CACHE_DIR = os.path.join(ROOT_DIR, '.stage_cache')
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_MB = 2048
+
+
+def cache_enabled() -> bool:
+    return os.environ.get('STAGE_CACHE', '1').lower() not in ('0', 'false', 'no')
+
+
+def get_cache_dir() -> str:
+    return os.environ.get('STAGE_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+
+def get_cache_max_bytes() -> int:
+    return int(float(os.environ.get('STAGE_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+
+
+# ─── HASHING ────────────────────────────────────────────────────────────────────
+def _update_hash(h, obj) -> None:
+    """Feed a stable byte representation of `obj` into the hash `h`."""
+    if isinstance(obj, pd.DataFrame):
+        h.update(b'DataFrame')
+        _update_hash(h, [str(c) for c in obj.columns])
+        _update_hash(h, [str(t) for t in obj.dtypes])
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(b'Series')
+        _update_hash(h, str(obj.name))
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f'ndarray{obj.dtype}{obj.shape}'.encode())
+        if obj.dtype == object:
+            # tobytes() on object arrays would hash pointers, not values
+            h.update(pd.util.hash_array(obj.ravel().astype(str)).tobytes())
+        else:
+            h.update(np.ascontiguousarray(obj).tobytes())
+    elif hasattr(obj, 'tocsr') and hasattr(obj, 'indptr'):
+        # scipy.sparse CSR/CSC matrices
+        h.update(f'sparse{obj.format}{obj.shape}'.encode())
+        for part in (obj.data, obj.indices, obj.indptr):
+            _update_hash(h, np.asarray(part))
+    elif isinstance(obj, (list, tuple)):
+        h.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for item in obj:
+            _update_hash(h, item)
+    elif isinstance(obj, (set, frozenset)):
+        # Iteration order of sets of str varies between processes (hash randomization)
+        h.update(f'set{len(obj)}'.encode())
+        for item in sorted(obj, key=repr):
+            _update_hash(h, item)
+    elif isinstance(obj, dict):
+        h.update(f'dict{len(obj)}'.encode())
+        for key in sorted(obj, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, obj[key])
+    elif obj is None or isinstance(obj, (str, bytes, int, float, bool)):
+        h.update(f'{type(obj).__name__}:{obj!r}'.encode())
+    else:
+        h.update(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def hash_inputs(*objs) -> str:
+    """Return a SHA-256 hex digest over an arbitrary set of inputs."""
+    h = hashlib.sha256()
+    for obj in objs:
+        _update_hash(h, obj)
+    return h.hexdigest()
+
+
+def hash_files(*paths: str) -> str:
+    """Return a SHA-256 hex digest over the contents of the given files."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def _source(obj) -> str:
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return obj.__code__.co_code.hex() if hasattr(obj, '__code__') else repr(obj)
+
+
+def _dependency_fingerprint(dependency) -> str:
+    """Stable description of something a stage's output depends on.
+
+    - third-party modules (with __version__) contribute their version
+    - project modules contribute their full source
+    - functions contribute their source
+    - anything else contributes its hashed value (e.g. a stop-word set)
+    """
+    if isinstance(dependency, types.ModuleType):
+        version = getattr(dependency, '__version__', None)
+        if version is not None:
+            return f'{dependency.__name__}=={version}'
+        return f'{dependency.__name__}\n{_source(dependency)}'
+    if callable(dependency):
+        return f'{dependency.__module__}.{dependency.__qualname__}\n{_source(dependency)}'
+    return hash_inputs(dependency)
+
+
+def function_fingerprint(func, depends_on: tuple = ()) -> str:
+    """Hash of a function's source and its dependencies, so that editing a
+    helper or upgrading a library invalidates the cached entries."""
+    h = hashlib.sha256(f'{func.__module__}.{func.__qualname__}\n{_source(func)}'.encode())
+    for dependency in depends_on:
+        h.update(_dependency_fingerprint(dependency).encode())
+    return h.hexdigest()
+
+
+# ─── CACHE STORE ────────────────────────────────────────────────────────────────
+def _entry_path(stage: str, key: str) -> str:
+    return os.path.join(get_cache_dir(), stage, f'{key}.pkl')
+
+
+def load_cached(stage: str, key: str):
+    """Return (True, value) on a cache hit, (False, None) otherwise."""
+    if not cache_enabled():
+        return False, None
+    path = _entry_path(stage, key)
+    if not os.path.exists(path):
+        return False, None
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+        os.utime(path)  # mark as recently used for LRU eviction
+        logger.debug("Cache hit for %s (%s)", stage, key[:12])
+        return True, value
+    except Exception as e:
+        # A corrupt entry is treated as a miss and recomputed
+        logger.error("Error reading cache entry %s: %s", path, e)
+        return False, None
+
+
+def store_cached(stage: str, key: str, value) -> None:
+    """Store `value` for `stage` under `key`, written atomically."""
+    if not cache_enabled():
+        return
+    path = _entry_path(stage, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp.{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        logger.debug("Cached %s output (%s)", stage, key[:12])
+        prune_cache()
+    except Exception as e:
+        logger.error("Error writing cache entry %s: %s", path, e)
+
+
+def prune_cache(max_bytes: int = None) -> None:
+    """Evict least recently used entries until the cache fits in `max_bytes`."""
+    max_bytes = get_cache_max_bytes() if max_bytes is None else max_bytes
+    try:
+        entries = []
+        for dirpath, _, filenames in os.walk(get_cache_dir()):
+            for filename in filenames:
+                if filename.endswith('.pkl'):
+                    path = os.path.join(dirpath, filename)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        # Hits refresh the mtime, so the oldest mtime is the least recently used
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            logger.debug("Evicted cache entry %s", path)
+    except Exception as e:
+        logger.error("Error pruning stage cache: %s", e)
+
+
+def cached_stage(stage: str = None, depends_on: tuple = ()):
+    """Cache a pure stage function's return value under a hash of its inputs.
+
+    The key covers the function's source, every positional and keyword
+    argument, and `depends_on`: the helpers, project modules, libraries
+    (by version) and module-level data the function's behaviour relies on.
+    Anything the function uses that is not listed there will not invalidate
+    the cache. Functions with side effects should not be decorated.
+    """
+    def decorator(func):
+        name = stage or func.__name__
+        fingerprint = function_fingerprint(func, depends_on)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not cache_enabled():
+                return func(*args, **kwargs)
+            key = hash_inputs(fingerprint, args, kwargs)
+            hit, value = load_cached(name, key)
+            if hit:
+                return value
+            logger.debug("Cache miss for %s (%s)", name, key[:12])
+            value = func(*args, **kwargs)
+            store_cached(name, key, value)
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import logging
+import functools
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows has no `resource` module
+    resource = None
+
+try:
+    import mlflow
+except ImportError:
+    mlflow = None
+
+
+# ─── LOGGING SETUP ──────────────────────────────────────────────────────────────
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+
+file_handler = logging.FileHandler('instrumentation.log')
+file_handler.setLevel(logging.ERROR)
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# ─── CONFIGURATION ──────────────────────────────────────────────────────────────
+# STAGE_METRICS_DIR  : directory of the per-stage metrics files (default: stage_metrics/)
+# STAGE_PROFILE      : set to 1/true to dump a cProfile file for every stage
+# STAGE_PROFILE_DIR  : directory for the .prof dumps (default: profiles/)
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_METRICS_DIR = os.path.join(ROOT_DIR, 'stage_metrics')
+DEFAULT_PROFILE_DIR = os.path.join(ROOT_DIR, 'profiles')
+
+
+# Metrics of every stage run in this process; also sums repeated calls (e.g. train and test split)
+_process_totals = {}
+
+
+def _profiling_enabled() -> bool:
+    return os.environ.get('STAGE_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+def get_metrics_path(script: str = None) -> str:
+    """Metrics file of a pipeline script: stage_metrics/<script>.json.
+
+    Defaults to the running script (e.g. model_building for
+    src/model/model_building.py), so each DVC stage owns exactly one file.
+    """
+    script = script or os.path.splitext(os.path.basename(sys.argv[0] or 'interactive'))[0]
+    return os.path.join(os.environ.get('STAGE_METRICS_DIR', DEFAULT_METRICS_DIR), f'{script}.json')
+
+
+# ─── RESOURCE HELPERS ───────────────────────────────────────────────────────────
+def get_peak_rss_mb() -> float:
+    """Return the process memory high-water mark in MB (0.0 if unavailable)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _count_rows(obj) -> int:
+    """Best-effort row count for DataFrames, arrays, sparse matrices and tuples."""
+    if obj is None:
+        return 0
+    if isinstance(obj, tuple):
+        return _count_rows(obj[0]) if obj else 0
+    shape = getattr(obj, 'shape', None)
+    if shape:
+        return int(shape[0])
+    try:
+        return len(obj)
+    except TypeError:
+        return 0
+
+
+# ─── METRIC SINKS ───────────────────────────────────────────────────────────────
+def save_stage_metrics(stage_metrics: dict, file_path: str = None) -> None:
+    """Write {stage: metrics} of this process to its metrics file.
+
+    The file is rewritten rather than merged, so it never holds entries from
+    an earlier run of the script.
+    """
+    file_path = file_path or get_metrics_path()
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        with open(file_path, 'w') as f:
+            json.dump(stage_metrics, f, indent=4)
+        logger.debug("Stage metrics saved to %s", file_path)
+    except Exception as e:
+        # Instrumentation must never break the pipeline
+        logger.error("Error saving stage metrics to %s: %s", file_path, e)
+
+
+def load_stage_metrics(scripts: list) -> dict:
+    """Load and merge the metrics files of the given pipeline scripts."""
+    stage_metrics = {}
+    for script in scripts:
+        file_path = get_metrics_path(script)
+        try:
+            with open(file_path, 'r') as f:
+                stage_metrics.update(json.load(f))
+        except FileNotFoundError:
+            logger.debug("No stage metrics found at %s", file_path)
+        except Exception as e:
+            logger.error("Error loading stage metrics from %s: %s", file_path, e)
+    return stage_metrics
+
+
+def log_stage_metrics_to_mlflow(stage_metrics: dict) -> None:
+    """Log {stage: {metric: value}} to the active MLflow run as `stage.<stage>.<metric>`."""
+    if mlflow is None:
+        return
+    try:
+        if mlflow.active_run() is None:
+            return
+        for stage, metrics in stage_metrics.items():
+            for key, value in metrics.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    mlflow.log_metric(f"stage.{stage}.{key}", value)
+    except Exception as e:
+        logger.error("Error logging stage metrics to MLflow: %s", e)
+
+
+# ─── STAGE CONTEXT MANAGER / DECORATOR ──────────────────────────────────────────
+@contextmanager
+def profile_stage(stage: str):
+    """Measure wall time, CPU time, rows/sec and peak RSS of a block of code.
+
+    Yields a dict; set `stats['rows']` inside the block to get a throughput
+    figure. On exit the metrics are written to the script's metrics file and,
+    if an MLflow run is active, logged as MLflow metrics.
+
+    Example:
+        with profile_stage('train_lgbm') as stats:
+            model.fit(X, y)
+            stats['rows'] = X.shape[0]
+    """
+    stats = {'rows': 0}
+    profiler = cProfile.Profile() if _profiling_enabled() else None
+
+    start_rss = get_peak_rss_mb()
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    if profiler is not None:
+        profiler.enable()
+
+    status = 'failed'
+    try:
+        yield stats
+        status = 'success'
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall_time = time.perf_counter() - start_wall
+        cpu_time = time.process_time() - start_cpu
+        peak_rss = get_peak_rss_mb()
+        rows = int(stats.get('rows') or 0)
+
+        # Repeated calls in one process (e.g. train then test) are added together
+        previous = _process_totals.get(stage)
+        calls = 1
+        rss_delta = peak_rss - start_rss
+        if previous is not None:
+            calls += previous['calls']
+            wall_time += previous['wall_time_s']
+            cpu_time += previous['cpu_time_s']
+            rows += previous['rows']
+            rss_delta = max(rss_delta, previous['peak_rss_delta_mb'])
+            if previous['status'] == 'failed':
+                status = 'failed'
+
+        metrics = {
+            'status': status,
+            'calls': calls,
+            'wall_time_s': round(wall_time, 6),
+            'cpu_time_s': round(cpu_time, 6),
+            'cpu_utilization': round(cpu_time / wall_time, 4) if wall_time > 0 else 0.0,
+            'rows': rows,
+            'rows_per_sec': round(rows / wall_time, 2) if wall_time > 0 else 0.0,
+            'peak_rss_mb': round(peak_rss, 2),
+            'peak_rss_delta_mb': round(rss_delta, 2),
+        }
+        _process_totals[stage] = metrics
+
+        if profiler is not None:
+            profile_dir = os.environ.get('STAGE_PROFILE_DIR', DEFAULT_PROFILE_DIR)
+            try:
+                os.makedirs(profile_dir, exist_ok=True)
+                # One dump per call: stage.prof, stage.2.prof, ...
+                profile_name = f'{stage}.prof' if calls == 1 else f'{stage}.{calls}.prof'
+                profile_path = os.path.join(profile_dir, profile_name)
+                profiler.dump_stats(profile_path)
+                metrics['profile_path'] = profile_path
+                logger.debug("cProfile dump for %s written to %s", stage, profile_path)
+            except Exception as e:
+                logger.error("Error writing profile for %s: %s", stage, e)
+
+        logger.info(
+            "Stage %s %s in %.3fs (cpu %.3fs, %d rows, %.1f rows/s, peak RSS %.1f MB)",
+            stage, status, wall_time, cpu_time, rows, metrics['rows_per_sec'], peak_rss
+        )
+        save_stage_metrics(_process_totals)
+        log_stage_metrics_to_mlflow({stage: metrics})
+
+
+def instrument_stage(stage: str = None, rows=None):
+    """Decorator version of `profile_stage`.
+
+    Args:
+        stage (str): Stage name, defaults to the function name
+        rows (callable): Optional `rows(result, *args, **kwargs) -> int`;
+            by default the row count of the return value is used
+    """
+    def decorator(func):
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_stage(name) as stats:
+                result = func(*args, **kwargs)
+                try:
+                    stats['rows'] = rows(result, *args, **kwargs) if rows else _count_rows(result)
+                except Exception as e:
+                    logger.error("Error counting rows for stage %s: %s", name, e)
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Pipeline modules are imported as `src.<package>.<module>`, as the stage scripts do
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture(autouse=True)
+def isolated_pipeline_outputs(tmp_path, monkeypatch):
+    """Keep stage metrics and cache entries written by pipeline functions out of the working tree."""
+    monkeypatch.setenv('STAGE_METRICS_DIR', str(tmp_path / 'stage_metrics'))
+    monkeypatch.setenv('STAGE_CACHE_DIR', str(tmp_path / 'stage_cache'))
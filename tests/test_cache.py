@@ -0,0 +1,87 @@
+import os
+import sys
+import types
+import subprocess
+
+import pytest
+
+from src.utils import cache
+from src.utils.cache import function_fingerprint, cached_stage, store_cached, load_cached, prune_cache
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def stage(text):
+    return helper(text)
+
+
+def helper(text):
+    return text.lower()
+
+
+def edited_helper(text):
+    return text.upper()
+
+
+def fake_library(version: str) -> types.ModuleType:
+    module = types.ModuleType('fakelib')
+    module.__version__ = version
+    return module
+
+
+@pytest.mark.parametrize('before, after', [
+    ((helper,), (edited_helper,)),
+    (({'the', 'a'},), ({'the', 'an'},)),
+    ((fake_library('1.0'),), (fake_library('1.1'),)),
+    ((), (helper,)),
+])
+def test_depends_on_change_invalidates_key(before, after):
+    assert function_fingerprint(stage, before) == function_fingerprint(stage, before)
+    assert function_fingerprint(stage, before) != function_fingerprint(stage, after)
+
+
+def test_cached_stage_recomputes_when_dependency_changes():
+    calls = []
+
+    def run(text):
+        calls.append(text)
+        return text
+
+    cached_stage('run', depends_on=({'v1'},))(run)('x')
+    cached_stage('run', depends_on=({'v1'},))(run)('x')
+    cached_stage('run', depends_on=({'v2'},))(run)('x')
+
+    assert calls == ['x', 'x']
+
+
+def test_set_hash_is_stable_across_processes(tmp_path):
+    code = (
+        f"import sys; sys.path.insert(0, {ROOT_DIR!r})\n"
+        "from src.utils.cache import hash_inputs\n"
+        "print(hash_inputs({'not', 'no', 'but', 'however', frozenset({'yet', 'nor'})}))\n"
+    )
+    digests = set()
+    for seed in ('1', '2', '3'):
+        env = {**os.environ, 'PYTHONHASHSEED': seed}
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                check=True, env=env, cwd=str(tmp_path))
+        digests.add(output.stdout.strip().splitlines()[-1])
+
+    assert len(digests) == 1
+
+
+def test_prune_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(cache, 'get_cache_max_bytes', lambda: 10 ** 9)
+    payload = b'x' * 1000
+    for i, key in enumerate(('oldest', 'middle', 'newest')):
+        store_cached('stage', key, payload)
+        os.utime(cache._entry_path('stage', key), (1000 + i, 1000 + i))
+
+    # A hit refreshes the entry, so 'middle' becomes the least recently used
+    assert load_cached('stage', 'oldest') == (True, payload)
+    entry_size = os.path.getsize(cache._entry_path('stage', 'newest'))
+    prune_cache(max_bytes=2 * entry_size)
+
+    assert load_cached('stage', 'middle') == (False, None)
+    assert load_cached('stage', 'oldest')[0]
+    assert load_cached('stage', 'newest')[0]
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.data_ingestion import assign_splits, split_data, check_stratification
+
+
+def make_comments(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'clean_comment': [f"comment {seed} {i} {rng.integers(1_000_000)}" for i in range(n_rows)],
+        'category': rng.integers(-1, 2, n_rows),
+    })
+
+
+def split_of(frames: tuple) -> pd.Series:
+    return pd.concat([pd.Series(name, index=df.index) for name, df in zip(('train', 'validation', 'test'), frames)])
+
+
+def test_assignment_does_not_depend_on_batching_or_order():
+    df = make_comments(5000)
+    expected = split_of(split_data(df, 'clean_comment', 0.2, 0.1, random_state=42))
+
+    batched = split_of(split_data(df, 'clean_comment', 0.2, 0.1, random_state=42, batch_size=777))
+    shuffled = split_of(split_data(df.sample(frac=1, random_state=0), 'clean_comment', 0.2, 0.1,
+                                   random_state=42, batch_size=1000))
+
+    pd.testing.assert_series_equal(batched.sort_index(), expected.sort_index())
+    pd.testing.assert_series_equal(shuffled.sort_index(), expected.sort_index())
+
+
+def test_appended_rows_do_not_move_existing_rows():
+    df = make_comments(3000)
+    grown = pd.concat([df, make_comments(2000, seed=1)], ignore_index=True)
+
+    before = assign_splits(df, 'clean_comment', 0.2, 0.1, random_state=42)
+    after = assign_splits(grown, 'clean_comment', 0.2, 0.1, random_state=42)
+
+    pd.testing.assert_series_equal(after.loc[df.index], before)
+
+
+def test_validation_is_taken_from_train_only():
+    df = make_comments(5000)
+
+    without = assign_splits(df, 'clean_comment', 0.2, 0.0, random_state=42)
+    with_validation = assign_splits(df, 'clean_comment', 0.2, 0.1, random_state=42)
+
+    assert ((without == 'test') == (with_validation == 'test')).all()
+    assert (without[with_validation == 'validation'] == 'train').all()
+    assert abs((with_validation == 'validation').mean() - 0.1) < 0.02
+
+
+def test_balanced_strata_pass_the_check():
+    df = make_comments(6000)
+
+    fractions = check_stratification(
+        df['category'], assign_splits(df, 'clean_comment', 0.2, 0.1, random_state=42),
+        {'train': 0.7, 'validation': 0.1, 'test': 0.2}, tolerance=0.03
+    )
+
+    assert list(fractions.columns) == ['train', 'validation', 'test']
+    assert len(fractions) == 3
+
+
+def test_key_shared_by_a_whole_stratum_fails_the_check():
+    df = make_comments(3000)
+    # Every neutral row has the same key, so the whole stratum lands in one split
+    df.loc[df['category'] == 0, 'clean_comment'] = 'same text'
+
+    with pytest.raises(ValueError, match='category=0'):
+        split_data(df, 'clean_comment', 0.2, 0.1, random_state=42,
+                   stratify_column='category', stratify_tolerance=0.02)
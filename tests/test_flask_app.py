@@ -0,0 +1,75 @@
+import os
+import sys
+import pickle
+import importlib
+
+import pytest
+
+for module in ('flask', 'flask_cors', 'mlflow', 'wordcloud', 'nltk', 'sklearn'):
+    pytest.importorskip(module)
+from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+FLASK_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'flask'))
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('serving')
+    texts = ['great video', 'bad video', 'ok video', 'great great', 'bad bad', 'ok ok']
+    labels = [1, -1, 0, 1, -1, 0]
+    vectorizer = TfidfVectorizer()
+    model = LogisticRegression().fit(vectorizer.fit_transform(texts), labels)
+    for name, obj in (('model.pkl', model), ('vectorizer.pkl', vectorizer)):
+        with open(tmp_path / name, 'wb') as f:
+            pickle.dump(obj, f)
+
+    environ = {'MODEL_PATH': str(tmp_path / 'model.pkl'),
+               'VECTORIZER_PATH': str(tmp_path / 'vectorizer.pkl'),
+               'MODEL_VERSION': 'test-version'}
+    previous = {key: os.environ.get(key) for key in environ}
+    os.environ.update(environ)
+    sys.path.insert(0, FLASK_DIR)
+    try:
+        main = importlib.import_module('main')
+        yield main, main.app.test_client()
+    finally:
+        sys.path.remove(FLASK_DIR)
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@pytest.mark.parametrize('body', [['great video'], 'great video', None, {'comments': 'great video'},
+                                  {'comments': ['great', 3]}, {}])
+def test_predict_rejects_malformed_bodies_with_json_400(client, body):
+    _, test_client = client
+    response = test_client.post('/predict', json=body)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_metrics_route_counts_only_valid_predictions(client):
+    _, test_client = client
+    test_client.post('/predict', json=['not a dict'])
+    response = test_client.post('/predict', json={'comments': ['Great video!!', 'Great video!!']})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+
+    text = test_client.get('/metrics').get_data(as_text=True)
+
+    assert 'sentiment_requests_total 1.0' in text
+    assert 'sentiment_batch_size_count 1' in text
+    assert 'sentiment_phase_latency_seconds_count{phase="predict"} 1' in text
+    assert 'sentiment_preprocess_cache_hits_total 1' in text
+    assert 'sentiment_model_info{version="test-version"} 1' in text
+
+
+def test_serving_uses_training_preprocessing(client):
+    main, _ = client
+    from src.data.data_preprocessing import preprocess_comment
+
+    assert main.preprocess_comment.__wrapped__ is preprocess_comment
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+lgb = pytest.importorskip('lightgbm')
+
+from src.model.quantized_lgbm import QuantizedLGBM, MISSING_NONE, MISSING_ZERO, MISSING_NAN
+
+
+def fit_lgbm(X, y, **kwargs) -> 'lgb.LGBMClassifier':
+    model = lgb.LGBMClassifier(
+        objective='multiclass', num_class=3, n_estimators=40, max_depth=6,
+        min_child_samples=5, verbose=-1, **kwargs
+    )
+    return model.fit(X, y)
+
+
+def sparse_tfidf_like(n_rows: int = 1500, n_features: int = 60, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = sp.random(n_rows, n_features, density=0.1, format='csr', random_state=seed, dtype=np.float64)
+    y = np.asarray(X[:, :3].argmax(axis=1)).ravel() - 1  # labels -1/0/1 like `category`
+    flip = rng.random(n_rows) < 0.1
+    y[flip] = rng.integers(-1, 2, flip.sum())
+    return X, y
+
+
+def dense_with_nans(n_rows: int = 1500, n_features: int = 10, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    y = np.digitize(X[:, 0] + X[:, 1], [-0.5, 0.5]) - 1
+    X[rng.random(X.shape) < 0.15] = np.nan
+    return X, y
+
+
+@pytest.mark.parametrize('dataset, fit_kwargs, expected_missing', [
+    (sparse_tfidf_like, {}, None),
+    (sparse_tfidf_like, {'zero_as_missing': True}, MISSING_ZERO),
+    (dense_with_nans, {}, MISSING_NAN),
+])
+def test_float32_export_matches_lgbm(dataset, fit_kwargs, expected_missing):
+    X, y = dataset()
+    model = fit_lgbm(X, y, **fit_kwargs)
+
+    quantized = QuantizedLGBM.from_lgbm(model, np.float32, np.float32)
+
+    if expected_missing is not None:
+        assert expected_missing in quantized.arrays['missing_type']
+    np.testing.assert_array_equal(quantized.predict(X), model.predict(X))
+    np.testing.assert_allclose(quantized.predict_proba(X), model.predict_proba(X), atol=1e-5)
+
+
+def test_missing_type_none_is_covered():
+    X, y = sparse_tfidf_like()
+    model = fit_lgbm(X.toarray(), y, use_missing=False)
+
+    quantized = QuantizedLGBM.from_lgbm(model, np.float32, np.float32)
+
+    assert set(np.unique(quantized.arrays['missing_type'])) == {MISSING_NONE}
+    np.testing.assert_array_equal(quantized.predict(X), model.predict(X.toarray()))
+
+
+@pytest.mark.parametrize('leaf_dtype, threshold_dtype', [('int8', np.float16), (np.float16, np.float16)])
+def test_reduced_precision_stays_close(leaf_dtype, threshold_dtype):
+    X, y = sparse_tfidf_like()
+    model = fit_lgbm(X, y)
+
+    quantized = QuantizedLGBM.from_lgbm(model, leaf_dtype, threshold_dtype)
+
+    agreement = (quantized.predict(X) == model.predict(X)).mean()
+    assert agreement > 0.98
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    X, y = sparse_tfidf_like()
+    quantized = QuantizedLGBM.from_lgbm(fit_lgbm(X, y), 'int8', np.float16)
+    path = str(tmp_path / 'model.npz')
+
+    quantized.save(path)
+    loaded = QuantizedLGBM.load(path)
+
+    assert loaded.arrays['leaf_values'].dtype == np.int8
+    np.testing.assert_array_equal(loaded.predict(X), quantized.predict(X))
@@ -0,0 +1,59 @@
+import os
+import sys
+from functools import lru_cache
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'flask')))
+from serving_metrics import Counter, Gauge, Histogram, CacheStats, MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency_seconds', 'Latency.', (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0, 3.0):
+        histogram.observe(value)
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines  # bounds are inclusive
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 5' in lines
+    assert 'latency_seconds_count 5' in lines
+    assert 'latency_seconds_sum 5.65' in lines
+
+
+def test_labelled_histogram_renders_every_declared_label():
+    histogram = Histogram('phase_seconds', 'Phase.', (1.0,), label_name='phase',
+                          label_values=('predict', 'serialize'))
+    histogram.observe(0.5, 'predict')
+    with histogram.time('serialize'):
+        pass
+
+    lines = histogram.render()
+
+    assert 'phase_seconds_bucket{phase="predict",le="+Inf"} 1' in lines
+    assert 'phase_seconds_count{phase="predict"} 1' in lines
+    assert 'phase_seconds_count{phase="serialize"} 1' in lines
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.register(Counter('requests_total', 'Requests.'))
+    in_flight = registry.register(Gauge('in_flight', 'In flight.', labels={'version': 'abc'}))
+
+    @lru_cache(maxsize=None)
+    def square(x):
+        return x * x
+
+    registry.register(CacheStats('square_cache', square))
+    requests.inc()
+    requests.inc(2)
+    in_flight.inc()
+    square(2), square(2), square(3)
+
+    text = registry.render()
+
+    assert text.endswith('\n')
+    assert '# TYPE requests_total counter\nrequests_total 3.0' in text
+    assert 'in_flight{version="abc"} 1.0' in text
+    assert 'square_cache_hits_total 1' in text
+    assert 'square_cache_misses_total 2' in text
+    assert 'square_cache_size 2' in text
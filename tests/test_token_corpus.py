@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.data.token_corpus import (
+    build_token_corpora, save_token_corpus, load_token_corpus, fit_tfidf_corpus, transform_corpus
+)
+
+
+def make_docs(n_docs: int, seed: int) -> list:
+    rng = random.Random(seed)
+    words = [f"w{i}x" for i in range(300)] + ["a", "great!", "not", "Café", "it's"]
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(0, 15))) for _ in range(n_docs)]
+
+
+@pytest.fixture
+def corpora():
+    train_docs, test_docs = make_docs(2000, seed=0), make_docs(500, seed=1)
+    train_corpus, test_corpus = build_token_corpora([train_docs, test_docs], [[0] * 2000, [1] * 500])
+    return train_docs, test_docs, train_corpus, test_corpus
+
+
+@pytest.mark.parametrize('ngram_range', [(1, 1), (1, 3), (2, 3)])
+def test_fit_matches_tfidf_vectorizer(corpora, ngram_range):
+    train_docs, test_docs, train_corpus, test_corpus = corpora
+    reference = TfidfVectorizer(ngram_range=ngram_range)
+    X_ref = reference.fit_transform(train_docs)
+
+    vectorizer, X = fit_tfidf_corpus(train_corpus, None, ngram_range)
+
+    assert list(vectorizer.get_feature_names_out()) == list(reference.get_feature_names_out())
+    assert abs(X - X_ref).max() < 1e-12
+    # The returned vectorizer works on raw strings and on the corpus alike
+    assert abs(vectorizer.transform(test_docs) - reference.transform(test_docs)).max() < 1e-12
+    assert abs(transform_corpus(vectorizer, test_corpus) - reference.transform(test_docs)).max() < 1e-12
+
+
+def test_max_features_selects_most_frequent():
+    # Term frequencies are all distinct, so there are no ties at the cut
+    docs = [' '.join(f"t{j}x" for j in range(i % 40)) for i in range(400)]
+    corpus, = build_token_corpora([docs])
+    reference = TfidfVectorizer(max_features=20)
+    X_ref = reference.fit_transform(docs)
+
+    vectorizer, X = fit_tfidf_corpus(corpus, 20, (1, 1))
+
+    assert list(vectorizer.get_feature_names_out()) == list(reference.get_feature_names_out())
+    assert abs(X - X_ref).max() < 1e-12
+
+
+def test_ngrams_do_not_cross_documents():
+    corpus, = build_token_corpora([["aa bb", "cc dd", "", "ee"]])
+    vectorizer, X = fit_tfidf_corpus(corpus, None, (2, 2))
+
+    assert sorted(vectorizer.vocabulary_) == ["aa bb", "cc dd"]
+    assert X.shape == (4, 2)
+    assert X[2].nnz == 0 and X[3].nnz == 0
+
+
+def test_save_and_load_roundtrip(tmp_path, corpora):
+    _, _, train_corpus, _ = corpora
+    path = tmp_path / 'train_corpus.npz'
+
+    save_token_corpus(train_corpus, str(path))
+    loaded = load_token_corpus(str(path))
+
+    assert loaded['vocab'] == train_corpus['vocab']
+    assert loaded['ids'].dtype == np.int32
+    np.testing.assert_array_equal(loaded['ids'], train_corpus['ids'])
+    np.testing.assert_array_equal(loaded['offsets'], train_corpus['offsets'])
+    np.testing.assert_array_equal(loaded['labels'], train_corpus['labels'])
+
+
+def test_empty_vocabulary_transforms_to_empty_matrix():
+    # Single characters are not tokens, so nothing in train makes it into the vocabulary
+    train_corpus, test_corpus = build_token_corpora([["a", ""], ["aa bb", ""]])
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    vectorizer.vocabulary_ = {}
+
+    assert transform_corpus(vectorizer, test_corpus).shape == (2, 0)
+
+
+def test_build_assigns_shared_ids_in_first_appearance_order():
+    train_corpus, test_corpus = build_token_corpora([["bb aa", "", "aa"], ["cc bb"]])
+
+    assert train_corpus['vocab'] == ["bb", "aa", "cc"]
+    np.testing.assert_array_equal(train_corpus['ids'], [0, 1, 1])
+    np.testing.assert_array_equal(train_corpus['offsets'], [0, 2, 2, 3])
+    np.testing.assert_array_equal(test_corpus['ids'], [2, 0])
+    np.testing.assert_array_equal(test_corpus['offsets'], [0, 2])